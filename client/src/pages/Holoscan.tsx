@@ -162,7 +162,7 @@ const pipelineTemplates = [
   {
     id: "valentine-rf",
     name: "Valentine RF Signal Processing",
-    description: "GPU-accelerated RF signal processing with cuSignal spectrogram",
+    description: "GPU-accelerated RF signal processing with cuFFT STFT spectrogram",
     icon: Radio,
     operators: ["MockSdrSourceOp", "CuSignalProcOp", "HolovizOp"],
     model: "cusignal",
@@ -2,7 +2,8 @@
 """
 GStreamer WebRTC Sender for DGX Spark
 Captures video from Logitech BRIO camera and streams via WebRTC
-with hardware-accelerated H.264 encoding using NVIDIA nvv4l2h264enc.
+with hardware-accelerated H.264 encoding using NVIDIA nvh264enc
+(falls back to nvv4l2h264enc when nvh264enc is not installed).
 
 Usage:
     python3 gstreamer-webrtc-sender.py --device /dev/video0 --resolution 1920x1080 --fps 30
@@ -10,8 +11,8 @@ Usage:
 Requirements:
     - GStreamer 1.0 with plugins: good, bad, ugly, libav
     - gst-plugins-bad with webrtcbin
-    - NVIDIA GStreamer plugins (nvv4l2h264enc)
-    - Python packages: websockets, asyncio, json
+    - NVIDIA GStreamer plugins (nvh264enc or nvv4l2h264enc)
+    - Python packages: websockets, asyncio, json (orjson optional)
 """
 
 import argparse
@@ -20,7 +21,9 @@ import json
 import logging
 import os
 import signal
+import socket
 import sys
+import threading
 from typing import Optional
 
 # GStreamer imports
@@ -37,6 +40,21 @@ except ImportError:
     print("Please install websockets: pip install websockets")
     sys.exit(1)
 
+# Faster JSON for signaling; fall back to stdlib when orjson is missing.
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers can
+# catch the stdlib exception either way.
+try:
+    import orjson
+
+    def _json_dumps(message: dict) -> str:
+        # Decode so websockets still sends a text frame
+        return orjson.dumps(message).decode()
+
+    _json_loads = orjson.loads
+except ImportError:
+    _json_dumps = json.dumps
+    _json_loads = json.loads
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -70,27 +88,61 @@ class WebRTCStreamer:
         self.webrtcbin: Optional[Gst.Element] = None
         self.websocket: Optional[websockets.WebSocketClientProtocol] = None
         self.loop: Optional[GLib.MainLoop] = None
+        self._glib_thread: Optional[threading.Thread] = None
+        
+        # Set by _configure_encoder; start() drops SFE if PLAYING fails
+        self._sfe_enabled = False
+        
+        # stop() can be called from the GLib thread (bus errors/EOS) and the
+        # main thread (signal handler); RLock so a signal mid-stop can't deadlock
+        self._stop_lock = threading.RLock()
+        self._stopped = False
         self.session_id: Optional[str] = None
         
+        # Event loop that owns the WebSocket; GStreamer callbacks run on
+        # streaming threads and must schedule work onto it explicitly
+        self._aio_loop = asyncio.get_event_loop()
+        
+        # Outbound signaling messages are coalesced into batched frames
+        self._send_queue: asyncio.Queue = asyncio.Queue()
+        self._drain_task: Optional[asyncio.Task] = None
+        
+        # m-line index -> mid of the local offer, for outgoing candidates
+        self._sdp_mids: list = []
+        
         # Initialize GStreamer
         Gst.init(None)
         
     def build_pipeline(self) -> str:
         """Build GStreamer pipeline string with hardware encoding."""
         
-        # Check if NVIDIA encoder is available
-        nvidia_encoder = "nvv4l2h264enc"
+        # Prefer nvh264enc with explicit low-latency rate control; the
+        # default NVENC rate controller buffers several frames for lookahead
         fallback_encoder = "x264enc"
         
-        # Try to use NVIDIA hardware encoder, fallback to software
-        encoder_element = f"""
-            nvvidconv ! 
-            {nvidia_encoder} 
-                bitrate={self.bitrate} 
-                preset-level=1 
-                control-rate=1 
-                iframeinterval=30
-        """
+        if Gst.ElementFactory.find("nvh264enc"):
+            encoder_element = f"""
+                nvvidconv ! 
+                nvh264enc name=encoder 
+                    bitrate={self.bitrate // 1000} 
+                    rc-mode=cbr-ld-hq 
+                    zerolatency=true 
+                    gop-size=30 
+                    bframes=0 
+                    rc-lookahead=0 
+                    preset=low-latency-hq 
+                    aud=true
+            """
+        else:
+            logger.warning("nvh264enc not available, falling back to nvv4l2h264enc")
+            encoder_element = f"""
+                nvvidconv ! 
+                nvv4l2h264enc 
+                    bitrate={self.bitrate} 
+                    preset-level=1 
+                    control-rate=1 
+                    iframeinterval=30
+            """
         
         # Fallback pipeline with software encoding
         fallback_pipeline = f"""
@@ -99,9 +151,17 @@ class WebRTCStreamer:
                 bitrate={self.bitrate // 1000} 
                 speed-preset=ultrafast 
                 tune=zerolatency 
-                key-int-max=30
+                key-int-max=15 
+                bframes=0 
+                rc-lookahead=0 
+                sliced-threads=true 
+                byte-stream=true 
+                aud=true
         """
         
+        # Frames are only dropped on raw video ahead of the encoder; the
+        # compressed/RTP side uses bounded but non-leaky queues, since losing
+        # an access unit or part of one corrupts decoding until the next IDR
         pipeline = f"""
             v4l2src device={self.device} ! 
             video/x-raw,width={self.width},height={self.height},framerate={self.fps}/1 ! 
@@ -109,8 +169,9 @@ class WebRTCStreamer:
             queue max-size-buffers=1 leaky=downstream ! 
             {encoder_element} ! 
             h264parse config-interval=-1 ! 
+            queue max-size-buffers=1 max-size-bytes=0 max-size-time=0 ! 
             rtph264pay config-interval=-1 pt=96 ! 
-            queue max-size-buffers=1 leaky=downstream ! 
+            queue max-size-buffers=1 max-size-bytes=0 max-size-time=0 ! 
             application/x-rtp,media=video,encoding-name=H264,payload=96 ! 
             webrtcbin name=sendrecv bundle-policy=max-bundle
         """
@@ -134,7 +195,7 @@ class WebRTCStreamer:
                 v4l2src device={self.device} ! 
                 video/x-raw,width={self.width},height={self.height},framerate={self.fps}/1 ! 
                 videoconvert ! 
-                x264enc bitrate={self.bitrate // 1000} speed-preset=ultrafast tune=zerolatency ! 
+                x264enc bitrate={self.bitrate // 1000} speed-preset=ultrafast tune=zerolatency key-int-max=15 bframes=0 rc-lookahead=0 sliced-threads=true byte-stream=true aud=true ! 
                 h264parse ! 
                 rtph264pay config-interval=-1 pt=96 ! 
                 webrtcbin name=sendrecv bundle-policy=max-bundle
@@ -142,6 +203,9 @@ class WebRTCStreamer:
             fallback = ' '.join(fallback.split())
             self.pipeline = Gst.parse_launch(fallback)
         
+        # Apply encoder properties that cannot be expressed in parse_launch
+        self._configure_encoder()
+        
         # Get webrtcbin element
         self.webrtcbin = self.pipeline.get_by_name("sendrecv")
         if not self.webrtcbin:
@@ -163,11 +227,33 @@ class WebRTCStreamer:
         
         logger.info("Pipeline created successfully")
         
+    def _configure_encoder(self):
+        """Enable NVENC Split-Frame Encoding and disable multi-pass if supported."""
+        encoder = self.pipeline.get_by_name("encoder")
+        if not encoder:
+            return
+        
+        # A GPU that cannot do SFE only fails when the encoder opens, so
+        # start() retries without it if the PLAYING transition fails
+        if encoder.find_property("split-frame-encoding"):
+            encoder.set_property("split-frame-encoding", True)
+            self._sfe_enabled = True
+            logger.info("NVENC split-frame encoding enabled")
+                
+        if encoder.find_property("multi-pass"):
+            # Parses the enum nick; an unknown value is logged by GStreamer
+            Gst.util_set_object_arg(encoder, "multi-pass", "disabled")
+            
     def _configure_ice_servers(self):
         """Configure STUN server for local webcam access."""
         if self.stun_server:
             self.webrtcbin.set_property("stun-server", self.stun_server)
             logger.info(f"STUN server configured: {self.stun_server}")
+        
+        # Gather all candidate types so they can be trickled as discovered
+        self.webrtcbin.set_property(
+            "ice-transport-policy", GstWebRTC.WebRTCICETransportPolicy.ALL
+        )
             
     def _on_negotiation_needed(self, element):
         """Called when negotiation is needed - create offer."""
@@ -185,33 +271,35 @@ class WebRTCStreamer:
             logger.error("Failed to create offer")
             return
             
-        # Set local description
-        promise = Gst.Promise.new()
-        element.emit("set-local-description", offer, promise)
-        promise.interrupt()
+        # Set local description; candidates are trickled from on-ice-candidate,
+        # so the offer is sent without waiting for ICE gathering to complete.
+        # The reply is not used, so no promise is allocated.
+        # Candidates only appear after this, so cache the mids up front.
+        self._sdp_mids = [
+            offer.sdp.get_media(i).get_attribute_val("mid")
+            for i in range(offer.sdp.medias_len())
+        ]
+        element.emit("set-local-description", offer, None)
         
         # Send offer to signaling server
         sdp_text = offer.sdp.as_text()
         logger.info("Sending SDP offer to signaling server")
-        asyncio.get_event_loop().create_task(
-            self._send_signaling_message({
-                "type": "offer",
-                "sdp": sdp_text,
-                "session_id": self.session_id,
-            })
-        )
+        self._queue_signaling_message({
+            "type": "offer",
+            "sdp": sdp_text,
+            "session_id": self.session_id,
+        })
         
     def _on_ice_candidate(self, element, mline_index, candidate):
         """Called when a new ICE candidate is discovered."""
         logger.debug(f"ICE candidate: {candidate}")
-        asyncio.get_event_loop().create_task(
-            self._send_signaling_message({
-                "type": "ice-candidate",
-                "candidate": candidate,
-                "sdpMLineIndex": mline_index,
-                "session_id": self.session_id,
-            })
-        )
+        self._queue_signaling_message({
+            "type": "ice-candidate",
+            "candidate": candidate,
+            "sdpMLineIndex": mline_index,
+            "sdpMid": self._sdp_mids[mline_index] if mline_index < len(self._sdp_mids) else None,
+            "session_id": self.session_id,
+        })
         
     def _on_ice_connection_state(self, element, _):
         """Called when ICE connection state changes."""
@@ -254,15 +342,41 @@ class WebRTCStreamer:
         """Send message to signaling server via WebSocket."""
         if self.websocket:
             try:
-                await self.websocket.send(json.dumps(message))
+                await self.websocket.send(_json_dumps(message))
             except Exception as e:
                 logger.error(f"Failed to send signaling message: {e}")
                 
+    def _queue_signaling_message(self, message: dict):
+        """Queue a signaling message for sending (safe from any thread)."""
+        self._aio_loop.call_soon_threadsafe(self._send_queue.put_nowait, message)
+        
+    async def _drain_send_queue(self):
+        """Coalesce queued signaling messages into a single WebSocket frame."""
+        while True:
+            messages = [await self._send_queue.get()]
+            
+            # Give back-to-back ICE candidates 5 ms to accumulate
+            await asyncio.sleep(0.005)
+            while not self._send_queue.empty():
+                messages.append(self._send_queue.get_nowait())
+                
+            if len(messages) == 1:
+                await self._send_signaling_message(messages[0])
+            else:
+                await self._send_signaling_message({
+                    "type": "batch",
+                    "messages": messages,
+                })
+                
     async def _handle_signaling_message(self, message: dict):
         """Handle incoming signaling message."""
         msg_type = message.get("type")
         
-        if msg_type == "answer":
+        if msg_type == "batch":
+            for batched in message.get("messages", []):
+                await self._handle_signaling_message(batched)
+                
+        elif msg_type == "answer":
             # Set remote description from answer
             sdp = message.get("sdp")
             if sdp:
@@ -272,9 +386,7 @@ class WebRTCStreamer:
                 answer = GstWebRTC.WebRTCSessionDescription.new(
                     GstWebRTC.WebRTCSDPType.ANSWER, sdpmsg
                 )
-                promise = Gst.Promise.new()
-                self.webrtcbin.emit("set-remote-description", answer, promise)
-                promise.interrupt()
+                self.webrtcbin.emit("set-remote-description", answer, None)
                 
         elif msg_type == "ice-candidate":
             # Add remote ICE candidate
@@ -288,9 +400,27 @@ class WebRTCStreamer:
             self.session_id = message.get("session_id")
             logger.info(f"Session created: {self.session_id}")
             
+            # Ask the peer to apply our candidates as they arrive
+            self._queue_signaling_message({
+                "type": "capabilities",
+                "trickle": True,
+                "session_id": self.session_id,
+            })
+            
         elif msg_type == "error":
             logger.error(f"Signaling error: {message.get('message')}")
             
+    def _configure_signaling_socket(self):
+        """Cap the send buffer on the signaling socket (asyncio already sets TCP_NODELAY)."""
+        sock = self.websocket.transport.get_extra_info("socket")
+        if sock is None:
+            return
+        
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 64 * 1024)
+        except OSError as e:
+            logger.warning(f"Could not tune signaling socket: {e}")
+            
     async def connect_signaling(self):
         """Connect to WebSocket signaling server."""
         logger.info(f"Connecting to signaling server: {self.signaling_url}")
@@ -300,9 +430,15 @@ class WebRTCStreamer:
                 self.signaling_url,
                 ping_interval=20,
                 ping_timeout=10,
+                # Signaling frames are tiny; deflate costs more than it saves
+                compression=None,
             )
             logger.info("Connected to signaling server")
             
+            self._configure_signaling_socket()
+            
+            self._drain_task = self._aio_loop.create_task(self._drain_send_queue())
+            
             # Send registration message
             await self._send_signaling_message({
                 "type": "register",
@@ -315,7 +451,7 @@ class WebRTCStreamer:
             # Start receiving messages
             async for message in self.websocket:
                 try:
-                    data = json.loads(message)
+                    data = _json_loads(message)
                     await self._handle_signaling_message(data)
                 except json.JSONDecodeError:
                     logger.error(f"Invalid JSON message: {message}")
@@ -323,6 +459,11 @@ class WebRTCStreamer:
         except Exception as e:
             logger.error(f"Signaling connection error: {e}")
             raise
+        finally:
+            # Server may close the socket without stop() being called
+            if self._drain_task:
+                self._drain_task.cancel()
+                self._drain_task = None
             
     def start(self):
         """Start the streaming pipeline."""
@@ -331,8 +472,23 @@ class WebRTCStreamer:
         # Create pipeline
         self.create_pipeline()
         
+        # Dispatch GLib sources (bus watch, webrtcbin notifications) on their
+        # own thread; the asyncio loop stays on the main thread for signaling
+        self.loop = GLib.MainLoop()
+        self._glib_thread = threading.Thread(
+            target=self.loop.run, name="glib-main-loop", daemon=True
+        )
+        self._glib_thread.start()
+        
         # Start pipeline
         ret = self.pipeline.set_state(Gst.State.PLAYING)
+        if ret == Gst.StateChangeReturn.FAILURE and self._sfe_enabled:
+            # Single-NVENC GPUs reject SFE when the encoder opens
+            logger.warning("Pipeline failed to start with split-frame encoding, retrying without it")
+            self.pipeline.set_state(Gst.State.NULL)
+            self.pipeline.get_by_name("encoder").set_property("split-frame-encoding", False)
+            self._sfe_enabled = False
+            ret = self.pipeline.set_state(Gst.State.PLAYING)
         if ret == Gst.StateChangeReturn.FAILURE:
             raise RuntimeError("Failed to start pipeline")
             
@@ -340,18 +496,39 @@ class WebRTCStreamer:
         
     def stop(self):
         """Stop the streaming pipeline."""
+        with self._stop_lock:
+            if self._stopped:
+                return
+            self._stopped = True
+            glib_thread = self._glib_thread
+            self._stop()
+            
+        # Join outside the lock: the GLib thread may be blocked on it in a
+        # concurrent stop() from a bus message, and can't join itself
+        if glib_thread and threading.current_thread() is not glib_thread:
+            glib_thread.join()
+            
+    def _stop(self):
+        """Tear down the pipeline, signaling and GLib loop (caller holds the lock)."""
         logger.info("Stopping WebRTC streamer...")
         
         if self.pipeline:
             self.pipeline.set_state(Gst.State.NULL)
             self.pipeline = None
             
+        # connect_signaling may clear the task concurrently on the asyncio loop
+        drain_task, self._drain_task = self._drain_task, None
+        if drain_task:
+            self._aio_loop.call_soon_threadsafe(drain_task.cancel)
+            
         if self.websocket:
-            asyncio.get_event_loop().create_task(self.websocket.close())
+            asyncio.run_coroutine_threadsafe(self.websocket.close(), self._aio_loop)
             self.websocket = None
             
         if self.loop:
             self.loop.quit()
+            self.loop = None
+            self._glib_thread = None
             
         logger.info("Streamer stopped")
         
@@ -422,6 +599,10 @@ def main():
         logger.error(f"Invalid resolution format: {args.resolution}")
         sys.exit(1)
         
+    # Create the event loop before the streamer so it can cache a reference
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    
     # Create streamer
     streamer = WebRTCStreamer(
         device=args.device,
@@ -444,7 +625,7 @@ def main():
     
     # Run streamer
     try:
-        asyncio.get_event_loop().run_until_complete(streamer.run())
+        loop.run_until_complete(streamer.run())
     except KeyboardInterrupt:
         streamer.stop()
     except Exception as e:
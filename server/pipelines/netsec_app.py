@@ -3,6 +3,36 @@ from holoscan.core import Application, Operator, OperatorSpec
 from holoscan.operators import HolovizOp
 import cupy as cp
 
+# Hashes each packet's IPv4 src/dst address into a 512x512 heatmap cell and
+# marks it red + opaque. Packets are fixed-stride Ethernet frame snapshots;
+# non-IPv4 frames are skipped.
+_hash_flows_kernel = cp.RawKernel(r'''
+extern "C" __global__
+void hash_flows(const unsigned char* pkts, int n_pkts, int stride,
+                unsigned char* heatmap) {
+    int i = blockIdx.x * blockDim.x + threadIdx.x;
+    if (i >= n_pkts) return;
+
+    const unsigned char* p = pkts + (size_t)i * stride;
+    // EtherType 0x0800 (IPv4)
+    if (p[12] != 0x08 || p[13] != 0x00) return;
+
+    // IPv4 header starts after the 14-byte Ethernet header
+    // Widen before shifting; unsigned char promotes to signed int otherwise
+    unsigned int src = ((unsigned int)p[26] << 24) | ((unsigned int)p[27] << 16)
+                     | ((unsigned int)p[28] << 8) | (unsigned int)p[29];
+    unsigned int dst = ((unsigned int)p[30] << 24) | ((unsigned int)p[31] << 16)
+                     | ((unsigned int)p[32] << 8) | (unsigned int)p[33];
+
+    // Multiplicative hash, top 9 bits -> row/column in [0, 512)
+    unsigned int h1 = (src * 2654435761u) >> 23;
+    unsigned int h2 = (dst * 2654435761u) >> 23;
+
+    // RGBA8 pixel as one little-endian word: R=0xFF, A=0xFF
+    atomicOr((unsigned int*)&heatmap[(h1 * 512 + h2) * 4], 0xFF0000FFu);
+}
+''', 'hash_flows')
+
 # -------------------------------------------------------------------------
 # Custom Operator: GPU Packet Parser
 # -------------------------------------------------------------------------
@@ -10,6 +40,12 @@ class GpuPacketParserOp(Operator):
     """
     Takes raw byte stream from PCAP/NIC, extracts headers on GPU.
     """
+    def __init__(self, fragment, *args, **kwargs):
+        # Reused every frame to avoid a 1 MB device allocation per compute
+        self._heatmap = cp.zeros((512, 512, 4), dtype=cp.uint8) # RGBA8
+        self.pkt_stride = 128  # Bytes per packet snapshot in raw_batch
+        super().__init__(fragment, *args, **kwargs)
+
     def setup(self, spec: OperatorSpec):
         spec.input("raw_bytes")
         spec.output("flow_heatmap") # Visual representation of traffic
@@ -18,21 +54,21 @@ class GpuPacketParserOp(Operator):
         # 1. Ingest Raw Bytes (Batch)
         raw_batch = op_input.receive("raw_bytes")
         
-        # 2. Parse Headers (Simulated GPU Kernel)
-        # In a real scenario, you would map raw_batch to a custom CUDA kernel
-        # that casts pointers to struct eth_hdr/ip_hdr.
-        
-        # SIMULATION: Generate a traffic heatmap based on "payload size"
+        # 2. Parse Headers (GPU Kernel)
         # Create a 512x512 grid representing IP src vs IP dst
-        heatmap = cp.zeros((512, 512, 4), dtype=cp.float32) # RGBA
+        heatmap = self._heatmap
+        heatmap.fill(0)
         
-        # Mock logic: Fill random spots to simulate active flows
-        # On DGX Spark, this would be actual flow hashing
-        active_flows_x = cp.random.randint(0, 512, 100)
-        active_flows_y = cp.random.randint(0, 512, 100)
+        # Kernel indexes bytes: accept any tensor/dtype as a contiguous uint8 view
+        raw_batch = cp.ascontiguousarray(cp.asarray(raw_batch)).view(cp.uint8)
         
-        heatmap[active_flows_x, active_flows_y, 0] = 1.0 # Red channel (Alert)
-        heatmap[active_flows_x, active_flows_y, 3] = 1.0 # Alpha
+        # One thread per packet hashes its flow into the heatmap
+        n_pkts = raw_batch.nbytes // self.pkt_stride
+        if n_pkts > 0:
+            _hash_flows_kernel(
+                ((n_pkts + 255) // 256,), (256,),
+                (raw_batch, cp.int32(n_pkts), cp.int32(self.pkt_stride), heatmap)
+            )
 
         op_output.emit(heatmap, "flow_heatmap")
 
@@ -72,7 +108,7 @@ class NetSecApp(Application):
         viz = HolovizOp(
             self, 
             name="net_viz",
-            tensors=[dict(name="flow_heatmap", type="color")],
+            tensors=[dict(name="flow_heatmap", type="color", image_format="r8g8b8a8_unorm")],
             window_title="DGX Spark: Network Forensics"
         )
 
@@ -2,11 +2,48 @@ import holoscan
 from holoscan.core import Application, Operator, OperatorSpec
 from holoscan.operators import HolovizOp
 import cupy as cp
-import cusignal
+import cupyx.scipy.fft
 import numpy as np
 
+# DLPack device types CuPy can import without a copy (kDLCUDA, kDLCUDAManaged)
+_DLPACK_CUDA_DEVICES = (2, 13)
+
+# Constant detrend + window multiply from overlapping frame view into the
+# FFT input buffer (scipy.signal.spectrogram default detrend='constant')
+_window_kernel = cp.ElementwiseKernel(
+    'complex64 x, complex64 m, float32 w',
+    'complex64 y',
+    'y = (x - m) * w',
+    'stft_window'
+)
+
+# |X|^2 with density scaling, matching scipy.signal.spectrogram
+_power_kernel = cp.ElementwiseKernel(
+    'complex64 z, float32 scale',
+    'float32 p',
+    'p = scale * (z.real() * z.real() + z.imag() * z.imag())',
+    'stft_power'
+)
+
+# Fused epsilon-add + log10 for spectrogram display scaling; output is
+# FP16 since the colormapped heatmap needs far less than FP32 precision
+_log_kernel = cp.ElementwiseKernel(
+    'float32 x',
+    'float16 y',
+    'y = log10f(x + 1e-9f)',
+    'spec_log'
+)
+
+# Carrier + scaled noise built directly in complex64
+_iq_kernel = cp.ElementwiseKernel(
+    'float32 phase, float32 nr, float32 ni',
+    'complex64 sig',
+    'sig = complex<float>(cosf(phase) + 0.1f * nr, sinf(phase) + 0.1f * ni)',
+    'mock_iq'
+)
+
 # -------------------------------------------------------------------------
-# Custom Operator: RF Signal Processor (cuSignal)
+# Custom Operator: RF Signal Processor (cuFFT STFT)
 # -------------------------------------------------------------------------
 class CuSignalProcOp(Operator):
     """
@@ -16,9 +53,24 @@ class CuSignalProcOp(Operator):
     3. Outputs Spectrogram Tensor for Viz/Inference
     """
     def __init__(self, fragment, *args, **kwargs):
+        self.fs = 20e6  # 20 MHz Sample Rate
         self.nperseg = 1024
+        self.noverlap = 512
+        self.n_samples = 20000  # Expected samples per received frame
+        # Blackman window is fixed for a given nperseg; build it once on GPU
+        self._window = cp.blackman(self.nperseg).astype(cp.float32)
+        self._scale = cp.float32(1.0 / (self.fs * float((self._window ** 2).sum())))
+        self._plan_frames(self._n_frames(self.n_samples))
         super().__init__(fragment, *args, **kwargs)
 
+    def _n_frames(self, n_samples):
+        return (n_samples - self.nperseg) // (self.nperseg - self.noverlap) + 1
+
+    def _plan_frames(self, n_frames):
+        """Allocate the framed STFT buffer and a matching batched cuFFT plan."""
+        self._frames = cp.empty((n_frames, self.nperseg), dtype=cp.complex64)
+        self._plan = cupyx.scipy.fft.get_fft_plan(self._frames, axes=-1)
+
     def setup(self, spec: OperatorSpec):
         spec.input("rx_iq")       # Input: Raw I/Q Data from SDR
         spec.output("spectrogram") # Output: Processed Tensor
@@ -28,30 +80,57 @@ class CuSignalProcOp(Operator):
         # We assume input comes as a CuPy array or generic Tensor
         iq_data = op_input.receive("rx_iq")
         
-        # Ensure data is on GPU (if coming from RDMA it already is)
-        if not isinstance(iq_data, cp.ndarray):
+        # Import device tensors as views (if coming from RDMA it is already
+        # on GPU); asarray on a wrapper can otherwise silently copy
+        if (hasattr(iq_data, "__dlpack_device__")
+                and int(iq_data.__dlpack_device__()[0]) in _DLPACK_CUDA_DEVICES):
+            iq_data = cp.from_dlpack(iq_data)
+        elif hasattr(iq_data, "__cuda_array_interface__"):
+            source_ptr = iq_data.__cuda_array_interface__["data"][0]
+            iq_data = cp.asarray(iq_data)
+            assert iq_data.data.ptr == source_ptr, "rx_iq import was not zero-copy"
+        else:
+            # Host buffers (e.g. NumPy) are uploaded to the GPU
             iq_data = cp.asarray(iq_data)
 
-        # 2. DSP Processing (cuSignal)
-        # Create a Blackman window on GPU
-        window = cp.blackman(self.nperseg)
-        
-        # Generate Spectrogram (Returns: freqs, time, magnitude)
+        # STFT kernels are typed complex64 (NumPy I/Q defaults to complex128)
+        iq_data = iq_data.astype(cp.complex64, copy=False)
+
+        # 2. DSP Processing (batched STFT on a pre-planned cuFFT)
         # nperseg=1024, noverlap=512
-        f, t, Sxx = cusignal.spectrogram(
-            iq_data, 
-            fs=20e6,  # 20 MHz Sample Rate
-            window=window, 
-            nperseg=self.nperseg
+        # Zero-pad short captures to one full segment so n_frames >= 1
+        if iq_data.shape[0] < self.nperseg:
+            padded = cp.zeros(self.nperseg, dtype=cp.complex64)
+            padded[:iq_data.shape[0]] = iq_data
+            iq_data = padded
+
+        n_frames = self._n_frames(iq_data.shape[0])
+        if n_frames != self._frames.shape[0]:
+            self._plan_frames(n_frames)
+
+        # Overlapping frames as a strided view, windowed into the FFT buffer
+        hop = self.nperseg - self.noverlap
+        frames = cp.lib.stride_tricks.as_strided(
+            iq_data,
+            shape=(n_frames, self.nperseg),
+            strides=(iq_data.strides[0] * hop, iq_data.strides[0])
         )
+        frame_means = frames.mean(axis=1, keepdims=True)
+        _window_kernel(frames, frame_means, self._window, self._frames)
+
+        spectrum = cupyx.scipy.fft.fft(
+            self._frames, axis=-1, overwrite_x=True, plan=self._plan
+        )
+
+        # Power spectral density as (freqs, time)
+        Sxx = _power_kernel(spectrum, self._scale).T
         
         # 3. Log Scale for Visualization
-        # Add epsilon to avoid log(0)
-        Sxx_log = cp.log10(Sxx + 1e-9)
-        
         # 4. Format for Holoviz (Height, Width, Channels)
-        # Reshape to (Height, Width, 1) for grayscale heatmap
-        out_tensor = Sxx_log.reshape(Sxx_log.shape[0], Sxx_log.shape[1], 1)
+        # Fused kernel adds epsilon (avoid log(0)) and writes straight into
+        # the (Height, Width, 1) grayscale heatmap layout via a view
+        out_tensor = cp.empty(Sxx.shape + (1,), dtype=cp.float16)
+        _log_kernel(Sxx, out_tensor.reshape(Sxx.shape))
         
         # Emit
         op_output.emit(out_tensor, "spectrogram")
@@ -60,16 +139,27 @@ class CuSignalProcOp(Operator):
 # Custom Operator: Mock High-Speed SDR Source (For Testing)
 # -------------------------------------------------------------------------
 class MockSdrSourceOp(Operator):
+    def __init__(self, fragment, *args, **kwargs):
+        # Carrier phase is identical every frame; only the noise changes
+        t = cp.arange(20000, dtype=cp.float32)
+        self._phase = (2 * cp.pi * 0.1 * t).astype(cp.float32)
+        self._rng = cp.random.default_rng()
+        # Noise (real/imag rows) and output are reused across frames
+        self._noise = cp.empty((2, 20000), dtype=cp.float32)
+        self._out = cp.empty(20000, dtype=cp.complex64)
+        super().__init__(fragment, *args, **kwargs)
+
     def setup(self, spec: OperatorSpec):
         spec.output("tx_iq")
 
     def compute(self, op_input, op_output, context):
         # Simulate 1ms of IQ data at 20Msps
         # Generate random noise + carrier signal on GPU
-        t = cp.arange(20000)
-        # Simple FM-like signal
-        sig = cp.exp(1j * 2 * cp.pi * 0.1 * t) + (cp.random.randn(20000) + 1j * cp.random.randn(20000)) * 0.1
-        op_output.emit(sig.astype(cp.complex64), "tx_iq")
+        # Simple FM-like signal, computed in single precision throughout
+        self._rng.standard_normal(dtype=cp.float32, out=self._noise)
+        _iq_kernel(self._phase, self._noise[0], self._noise[1], self._out)
+        # Downstream operators only read the buffer; it is overwritten next frame
+        op_output.emit(self._out, "tx_iq")
 
 # -------------------------------------------------------------------------
 # Application Definition
@@ -87,7 +177,7 @@ class ValentineRfApp(Application):
         viz = HolovizOp(
             self, 
             name="holoviz",
-            tensors=[dict(name="spectrogram", type="color", opacity=1.0)],
+            tensors=[dict(name="spectrogram", type="color", image_format="r16_sfloat", opacity=1.0)],
             window_title="DGX Spark: RF Spectrum"
         )
 
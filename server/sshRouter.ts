@@ -5023,10 +5023,10 @@ PYTHON_EOF`
         {
           id: "valentine-rf",
           name: "Valentine RF Signal Processing",
-          description: "GPU-accelerated RF signal processing pipeline using cuSignal for real-time spectrogram generation from I/Q samples",
+          description: "GPU-accelerated RF signal processing pipeline using a pre-planned cuFFT STFT for real-time spectrogram generation from I/Q samples",
           category: "rf-signal",
           operators: ["MockSdrSourceOp", "CuSignalProcOp", "HolovizOp"],
-          requirements: ["holoscan", "cupy", "cusignal"],
+          requirements: ["holoscan", "cupy"],
           visualization: "Spectrogram Heatmap",
           inputType: "I/Q Samples (Complex64)",
           outputType: "2D Spectrogram Tensor",
@@ -5074,42 +5074,136 @@ PYTHON_EOF`
 from holoscan.core import Application, Operator, OperatorSpec
 from holoscan.operators import HolovizOp
 import cupy as cp
-import cusignal
+import cupyx.scipy.fft
 import numpy as np
 
+_DLPACK_CUDA_DEVICES = (2, 13)
+
+_window_kernel = cp.ElementwiseKernel(
+    'complex64 x, complex64 m, float32 w',
+    'complex64 y',
+    'y = (x - m) * w',
+    'stft_window'
+)
+
+_power_kernel = cp.ElementwiseKernel(
+    'complex64 z, float32 scale',
+    'float32 p',
+    'p = scale * (z.real() * z.real() + z.imag() * z.imag())',
+    'stft_power'
+)
+
+_log_kernel = cp.ElementwiseKernel(
+    'float32 x',
+    'float16 y',
+    'y = log10f(x + 1e-9f)',
+    'spec_log'
+)
+
+_iq_kernel = cp.ElementwiseKernel(
+    'float32 phase, float32 nr, float32 ni',
+    'complex64 sig',
+    'sig = complex<float>(cosf(phase) + 0.1f * nr, sinf(phase) + 0.1f * ni)',
+    'mock_iq'
+)
+
 class CuSignalProcOp(Operator):
     def __init__(self, fragment, *args, **kwargs):
+        self.fs = ${input.config?.sampleRate || 20e6}
         self.nperseg = 1024
+        self.noverlap = 512
+        self.n_samples = 20000  # Expected samples per received frame
+        self._window = cp.blackman(self.nperseg).astype(cp.float32)
+        self._scale = cp.float32(1.0 / (self.fs * float((self._window ** 2).sum())))
+        self._plan_frames(self._n_frames(self.n_samples))
         super().__init__(fragment, *args, **kwargs)
 
+    def _n_frames(self, n_samples):
+        return (n_samples - self.nperseg) // (self.nperseg - self.noverlap) + 1
+
+    def _plan_frames(self, n_frames):
+        """Allocate the framed STFT buffer and a matching batched cuFFT plan."""
+        self._frames = cp.empty((n_frames, self.nperseg), dtype=cp.complex64)
+        self._plan = cupyx.scipy.fft.get_fft_plan(self._frames, axes=-1)
+
     def setup(self, spec: OperatorSpec):
-        spec.input("rx_iq")
-        spec.output("spectrogram")
+        spec.input("rx_iq")       # Input: Raw I/Q Data from SDR
+        spec.output("spectrogram") # Output: Processed Tensor
 
     def compute(self, op_input, op_output, context):
         iq_data = op_input.receive("rx_iq")
-        if not isinstance(iq_data, cp.ndarray):
+
+        if (hasattr(iq_data, "__dlpack_device__")
+                and int(iq_data.__dlpack_device__()[0]) in _DLPACK_CUDA_DEVICES):
+            iq_data = cp.from_dlpack(iq_data)
+        elif hasattr(iq_data, "__cuda_array_interface__"):
+            source_ptr = iq_data.__cuda_array_interface__["data"][0]
+            iq_data = cp.asarray(iq_data)
+            assert iq_data.data.ptr == source_ptr, "rx_iq import was not zero-copy"
+        else:
             iq_data = cp.asarray(iq_data)
-        window = cp.blackman(self.nperseg)
-        f, t, Sxx = cusignal.spectrogram(iq_data, fs=${input.config?.sampleRate || 20e6}, window=window, nperseg=self.nperseg)
-        Sxx_log = cp.log10(Sxx + 1e-9)
-        out_tensor = Sxx_log.reshape(Sxx_log.shape[0], Sxx_log.shape[1], 1)
+
+        iq_data = iq_data.astype(cp.complex64, copy=False)
+
+        if iq_data.shape[0] < self.nperseg:
+            padded = cp.zeros(self.nperseg, dtype=cp.complex64)
+            padded[:iq_data.shape[0]] = iq_data
+            iq_data = padded
+
+        n_frames = self._n_frames(iq_data.shape[0])
+        if n_frames != self._frames.shape[0]:
+            self._plan_frames(n_frames)
+
+        hop = self.nperseg - self.noverlap
+        frames = cp.lib.stride_tricks.as_strided(
+            iq_data,
+            shape=(n_frames, self.nperseg),
+            strides=(iq_data.strides[0] * hop, iq_data.strides[0])
+        )
+        frame_means = frames.mean(axis=1, keepdims=True)
+        _window_kernel(frames, frame_means, self._window, self._frames)
+
+        spectrum = cupyx.scipy.fft.fft(
+            self._frames, axis=-1, overwrite_x=True, plan=self._plan
+        )
+
+        Sxx = _power_kernel(spectrum, self._scale).T
+
+        out_tensor = cp.empty(Sxx.shape + (1,), dtype=cp.float16)
+        _log_kernel(Sxx, out_tensor.reshape(Sxx.shape))
+
         op_output.emit(out_tensor, "spectrogram")
 
 class MockSdrSourceOp(Operator):
+    def __init__(self, fragment, *args, **kwargs):
+        t = cp.arange(20000, dtype=cp.float32)
+        self._phase = (2 * cp.pi * 0.1 * t).astype(cp.float32)
+        self._rng = cp.random.default_rng()
+        self._noise = cp.empty((2, 20000), dtype=cp.float32)
+        self._out = cp.empty(20000, dtype=cp.complex64)
+        super().__init__(fragment, *args, **kwargs)
+
     def setup(self, spec: OperatorSpec):
         spec.output("tx_iq")
 
     def compute(self, op_input, op_output, context):
-        t = cp.arange(20000)
-        sig = cp.exp(1j * 2 * cp.pi * 0.1 * t) + (cp.random.randn(20000) + 1j * cp.random.randn(20000)) * 0.1
-        op_output.emit(sig.astype(cp.complex64), "tx_iq")
+        self._rng.standard_normal(dtype=cp.float32, out=self._noise)
+        _iq_kernel(self._phase, self._noise[0], self._noise[1], self._out)
+        op_output.emit(self._out, "tx_iq")
 
 class ValentineRfApp(Application):
     def compose(self):
         src = MockSdrSourceOp(self, name="sdr_source")
+
         dsp = CuSignalProcOp(self, name="cusignal_processor")
-        viz = HolovizOp(self, name="holoviz", tensors=[dict(name="spectrogram", type="color", opacity=1.0)], window_title="${input.config?.windowTitle || 'DGX Spark: RF Spectrum'}")
+
+        viz = HolovizOp(
+            self,
+            name="holoviz",
+            tensors=[dict(name="spectrogram", type="color", image_format="r16_sfloat", opacity=1.0)],
+            window_title="${input.config?.windowTitle || 'DGX Spark: RF Spectrum'}"
+        )
+
         self.add_flow(src, dsp, {("tx_iq", "rx_iq")})
         self.add_flow(dsp, viz, {("spectrogram", "receivers")})
 
@@ -5122,18 +5216,58 @@ from holoscan.core import Application, Operator, OperatorSpec
 from holoscan.operators import HolovizOp
 import cupy as cp
 
+_hash_flows_kernel = cp.RawKernel(r'''
+extern "C" __global__
+void hash_flows(const unsigned char* pkts, int n_pkts, int stride,
+                unsigned char* heatmap) {
+    int i = blockIdx.x * blockDim.x + threadIdx.x;
+    if (i >= n_pkts) return;
+
+    const unsigned char* p = pkts + (size_t)i * stride;
+    // EtherType 0x0800 (IPv4)
+    if (p[12] != 0x08 || p[13] != 0x00) return;
+
+    // IPv4 header starts after the 14-byte Ethernet header
+    // Widen before shifting; unsigned char promotes to signed int otherwise
+    unsigned int src = ((unsigned int)p[26] << 24) | ((unsigned int)p[27] << 16)
+                     | ((unsigned int)p[28] << 8) | (unsigned int)p[29];
+    unsigned int dst = ((unsigned int)p[30] << 24) | ((unsigned int)p[31] << 16)
+                     | ((unsigned int)p[32] << 8) | (unsigned int)p[33];
+
+    // Multiplicative hash, top 9 bits -> row/column in [0, 512)
+    unsigned int h1 = (src * 2654435761u) >> 23;
+    unsigned int h2 = (dst * 2654435761u) >> 23;
+
+    // RGBA8 pixel as one little-endian word: R=0xFF, A=0xFF
+    atomicOr((unsigned int*)&heatmap[(h1 * 512 + h2) * 4], 0xFF0000FFu);
+}
+''', 'hash_flows')
+
 class GpuPacketParserOp(Operator):
+    def __init__(self, fragment, *args, **kwargs):
+        self._heatmap = cp.zeros((512, 512, 4), dtype=cp.uint8) # RGBA8
+        self.pkt_stride = 128  # Bytes per packet snapshot in raw_batch
+        super().__init__(fragment, *args, **kwargs)
+
     def setup(self, spec: OperatorSpec):
         spec.input("raw_bytes")
-        spec.output("flow_heatmap")
+        spec.output("flow_heatmap") # Visual representation of traffic
 
     def compute(self, op_input, op_output, context):
         raw_batch = op_input.receive("raw_bytes")
-        heatmap = cp.zeros((512, 512, 4), dtype=cp.float32)
-        active_flows_x = cp.random.randint(0, 512, 100)
-        active_flows_y = cp.random.randint(0, 512, 100)
-        heatmap[active_flows_x, active_flows_y, 0] = 1.0
-        heatmap[active_flows_x, active_flows_y, 3] = 1.0
+
+        heatmap = self._heatmap
+        heatmap.fill(0)
+
+        raw_batch = cp.ascontiguousarray(cp.asarray(raw_batch)).view(cp.uint8)
+
+        n_pkts = raw_batch.nbytes // self.pkt_stride
+        if n_pkts > 0:
+            _hash_flows_kernel(
+                ((n_pkts + 255) // 256,), (256,),
+                (raw_batch, cp.int32(n_pkts), cp.int32(self.pkt_stride), heatmap)
+            )
+
         op_output.emit(heatmap, "flow_heatmap")
 
 class PcapLoaderOp(Operator):
@@ -5150,9 +5284,21 @@ class PcapLoaderOp(Operator):
 
 class NetSecApp(Application):
     def compose(self):
-        pcap_src = PcapLoaderOp(self, name="pcap_loader", pcap_file="${input.config?.pcapFile || '/data/capture_01.pcap'}")
+        pcap_src = PcapLoaderOp(
+            self,
+            name="pcap_loader",
+            pcap_file="${input.config?.pcapFile || '/data/capture_01.pcap'}"
+        )
+
         parser = GpuPacketParserOp(self, name="gpu_parser")
-        viz = HolovizOp(self, name="net_viz", tensors=[dict(name="flow_heatmap", type="color")], window_title="${input.config?.windowTitle || 'DGX Spark: Network Forensics'}")
+
+        viz = HolovizOp(
+            self,
+            name="net_viz",
+            tensors=[dict(name="flow_heatmap", type="color", image_format="r8g8b8a8_unorm")],
+            window_title="${input.config?.windowTitle || 'DGX Spark: Network Forensics'}"
+        )
+
         self.add_flow(pcap_src, parser, {("raw_bytes", "raw_bytes")})
         self.add_flow(parser, viz, {("flow_heatmap", "receivers")})
 